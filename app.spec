@@ -1,38 +1,92 @@
 # -*- mode: python ; coding: utf-8 -*-
+#
+# Build do executável:
+#     pyinstaller app.spec                 one-file (um único app.exe)
+#     pyinstaller app.spec -- --onedir     pasta dist/app/ com o app.exe e as bibliotecas
+#
+# O one-file extrai tudo para uma pasta temporária a cada execução, o que domina a subida nos
+# PCs mais lentos; o one-dir não extrai nada e sobe bem mais rápido. Em ambos o banco fica em
+# instance/, ao lado do .exe. benchmarks/bench_inicializacao.py --executavel mede a subida.
+import argparse
 
+parser = argparse.ArgumentParser()
+parser.add_argument('--onedir', action='store_true', help='gera dist/app/ em vez de um único app.exe')
+opcoes = parser.parse_args()
+
+# Módulos que o PyInstaller encontra (por hooks ou imports condicionais) mas que o app nunca
+# importa: ferramentas de build, REPL/depuração, GUI e os dialetos do SQLAlchemy de outros bancos
+# (o driver deles não vai no executável de qualquer forma). Conferido com o sys.modules do app
+# depois de passar por todas as rotas; se algum import falhar no .exe, tire o módulo daqui.
+EXCLUIR = [
+    'setuptools', 'pkg_resources', '_distutils_hack', 'distutils', 'packaging',
+    'unittest', 'doctest', 'pydoc', 'pydoc_data', 'pdb', '_pyrepl', 'curses',
+    'tkinter', 'xmlrpc', 'xml', 'ftplib', 'multiprocessing',
+    'sqlalchemy.dialects.mysql', 'sqlalchemy.dialects.mssql', 'sqlalchemy.dialects.oracle',
+    'sqlalchemy.dialects.postgresql', 'sqlalchemy.ext.asyncio', 'sqlalchemy.testing',
+]
 
 a = Analysis(
     ['app.py'],
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # O SQLAlchemy carrega o dialeto pelo nome da URL, então o PyInstaller não o vê
+    hiddenimports=['sqlalchemy.dialects.sqlite.pysqlite'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUIR,
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='app',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=True,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
+# Sem UPX: descomprimir as DLLs a cada execução custa mais na subida do que o tamanho economiza
+if opcoes.onedir:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='app',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=True,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        name='app',
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='app',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=True,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
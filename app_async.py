@@ -0,0 +1,515 @@
+"""
+Modo assíncrono (ASGI) do Controle de Ferramentas.
+
+Serve as rotas de Ferramenta/Movimento (dashboard, cadastro, retirada/devolução, histórico,
+edição, exclusão, o stream /eventos e a API JSON correspondente) com Quart + SQLAlchemy assíncrono (aiosqlite):
+um commit esperando o lock do SQLite prende só a corrotina do request, não uma thread do worker,
+então dezenas de quiosques consultando o dashboard não esgotam o servidor.
+
+Modelos, templates, consultas e cache são os mesmos do app.py. As demais rotas (importação e
+exportação, lote, reset, snapshots, /metrics) continuam sendo as do app.py, atendidas no mesmo
+processo por um adaptador WSGI -> ASGI.
+
+Dependências extras, só para este modo:
+    pip install quart aiosqlite greenlet
+    pip install "psycopg[binary]"           (com DATABASE_URL=postgresql://...)
+
+Uso:
+    hypercorn app_async:aplicacao --bind 0.0.0.0:5000
+
+Aqui o stream /eventos vem ligado (cada conexão é só uma corrotina); EVENTOS=0 desliga.
+"""
+from quart import Quart, Response, request, redirect, url_for, abort, make_response, render_template, stream_template
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from jinja2 import DictLoader
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.exceptions import HTTPException
+import asyncio
+import datetime
+import os
+import time
+
+# Antes de importar o app.py, que lê a configuração: no modo ASGI o stream é barato e vem ligado
+os.environ.setdefault('EVENTOS', '1')
+
+import app as app_wsgi
+from app import (
+    Ferramenta, Movimento, VersaoDados, ItemInventario, TEMPLATES, TIPOS_MOVIMENTO, MOTIVO_CADASTRO, MOTIVO_EDICAO, EXCLUSAO_LOTE,
+    HISTORICO_POR_PAGINA_PADRAO, HISTORICO_POR_PAGINA_MAXIMO, db, selecao_ferramentas, consulta_historico,
+    atualizacao_movimento, linha_ajuste, filtros_dashboard, rotas_por_id, aplicar_pragmas_sqlite, _reservar_escrita,
+    invalidar_inventario, invalidar_relatorios, marcar_reescrita, cache_dados, cache_paginas, etag_inventario,
+    _int_argumento, _formatar_cursor, _ler_cursor, _ler_data, _validar_movimento, _ferramenta_json, _movimento_json,
+    eventos, publicar_estoque, quer_json, EVENTOS_ATIVOS, EVENTOS_PING_S, EVENTOS_POLLING_S, EVENTOS_RETRY_MS, EVENTOS_FILA_MAXIMA,
+    MENSAGEM_RECARREGAR, GRUPO_ESPERA_MAXIMA,
+)
+
+app = Quart(__name__)
+app.jinja_loader = DictLoader(TEMPLATES)
+app.add_template_global(lambda: rotas_por_id(url_for), 'rotas_por_id')
+
+# Upload de importação passa pelo adaptador WSGI; o limite dele é por request
+TAMANHO_MAXIMO_WSGI = 256 * 1024 * 1024
+
+# Criados na subida do servidor (before_serving), dentro do event loop que vai usá-los
+motor = None
+Sessao = None
+
+
+# O psycopg (3) tem modo assíncrono próprio: o mesmo driver do app.py serve aqui
+DRIVERS_ASSINCRONOS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+psycopg'}
+
+
+def url_assincrona(url_sincrona):
+    """Troca o driver síncrono pelo assíncrono equivalente (sqlite -> aiosqlite, postgresql -> psycopg)."""
+    url = make_url(url_sincrona)
+    if url.get_backend_name() in DRIVERS_ASSINCRONOS:
+        return url.set(drivername=DRIVERS_ASSINCRONOS[url.get_backend_name()])
+    return url
+
+
+@app.before_serving
+async def iniciar():
+    """Prepara o banco e os templates pelo app.py (criar_app) e cria o engine assíncrono."""
+    global motor, Sessao
+    app_wsgi.criar_app()
+    motor = create_async_engine(url_assincrona(app_wsgi.app.config['SQLALCHEMY_DATABASE_URI']),
+                                **app_wsgi.app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    if motor.dialect.name == 'sqlite':
+        event.listen(motor.sync_engine, 'connect',
+                     lambda dbapi_connection, connection_record: aplicar_pragmas_sqlite(dbapi_connection))
+    # Sem expirar no commit: os objetos são usados depois que a sessão fecha (JSON, redirect)
+    Sessao = async_sessionmaker(motor, expire_on_commit=False)
+
+
+@app.after_serving
+async def encerrar():
+    await motor.dispose()
+
+
+async def _iniciar_transacao_de_escrita(sessao):
+    """Mesma reserva de escrita do modo WSGI (BEGIN IMMEDIATE no SQLite), na conexão da sessão assíncrona."""
+    conexao = await sessao.connection()
+    await conexao.run_sync(_reservar_escrita)
+
+
+# --- Dashboard ---
+
+async def versao_inventario():
+    """Versão assíncrona de app.versao_inventario: (token, escritas) da tabela versao_dados."""
+    async with Sessao() as sessao:
+        return tuple((await sessao.execute(
+            db.select(VersaoDados.token, VersaoDados.escritas).where(VersaoDados.id == 1))).one())
+
+
+async def consultar_ferramentas_cache(versao, limite, **filtros):
+    """Versão assíncrona de app.consultar_ferramentas_cache (mesmas chaves no cache_dados)."""
+    chave = (versao, tuple(sorted(dict(filtros, limite=limite).items())))
+    encontrado, valor = cache_dados.obter(chave)
+    if not encontrado:
+        async with Sessao() as sessao:
+            ferramentas = (await sessao.scalars(selecao_ferramentas(**filtros).limit(limite + 1))).all()
+        proximo_cursor = ferramentas[limite - 1].id if len(ferramentas) > limite else None
+        valor = ([ItemInventario(f.id, f.nome, f.quantidade) for f in ferramentas[:limite]], proximo_cursor)
+        cache_dados.guardar(chave, valor)
+    return valor
+
+
+@app.route('/')
+async def index():
+    """Dashboard, com o mesmo cache de página e ETag do modo WSGI."""
+    filtros = filtros_dashboard(request.args)
+    reset_success = request.args.get('reset_success')
+
+    ultimo_evento = eventos.ultimo_id() if EVENTOS_ATIVOS else None
+    versao = await versao_inventario()
+    etag = etag_inventario(versao)
+    if request.if_none_match.contains_weak(etag):
+        resposta = await make_response('', 304)
+    else:
+        chave = (versao, reset_success, tuple(sorted(filtros.items())))
+        encontrado, html = cache_paginas.obter(chave)
+        if not encontrado:
+            ferramentas, proximo_cursor = await consultar_ferramentas_cache(versao, **filtros)
+            html = await render_template('index.html', ferramentas=ferramentas, reset_success=reset_success,
+                                         proximo_cursor=proximo_cursor, ultimo_evento=ultimo_evento, etag=etag,
+                                         polling_s=EVENTOS_POLLING_S, **filtros)
+            cache_paginas.guardar(chave, html)
+        resposta = await make_response(html)
+    resposta.set_etag(etag, weak=True)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
+
+
+# --- Escritas ---
+
+async def cadastrar(nome, quantidade):
+    async with Sessao() as sessao:
+        ferramenta = Ferramenta(nome=nome, quantidade=quantidade)
+        sessao.add(ferramenta)
+        await sessao.flush()
+        if quantidade:
+            sessao.add(Movimento(**linha_ajuste(ferramenta.id, quantidade, MOTIVO_CADASTRO)))
+        await sessao.commit()
+    invalidar_inventario()
+    eventos.publicar('nova', _ferramenta_json(ferramenta))
+    return ferramenta
+
+
+async def aplicar_movimento(ferramenta_id, tipo, usuario, quantidade):
+    """Mesma escrita atômica de app.aplicar_movimento. Retorna o Movimento ou None."""
+    async with Sessao() as sessao:
+        await _iniciar_transacao_de_escrita(sessao)
+        saldo = (await sessao.execute(atualizacao_movimento(ferramenta_id, tipo, quantidade))).scalar()
+        if saldo is None:
+            await sessao.rollback()
+            return None
+        movimento = Movimento(usuario=usuario, tipo=tipo, quantidade=quantidade, ferramenta_id=ferramenta_id)
+        sessao.add(movimento)
+        await sessao.commit()
+    invalidar_inventario()
+    publicar_estoque(ferramenta_id, saldo)
+    return movimento
+
+
+async def ferramenta_existe(ferramenta_id):
+    async with Sessao() as sessao:
+        return await sessao.get(Ferramenta, ferramenta_id) is not None
+
+
+@app.route('/cadastrar', methods=['POST'])
+async def cadastrar_ferramenta():
+    formulario = await request.form
+    nome = (formulario.get('nome') or '').strip()
+    try:
+        quantidade = int(formulario.get('quantidade'))
+    except (TypeError, ValueError):
+        return redirect(url_for('index'))
+
+    if nome and quantidade >= 0:
+        await cadastrar(nome, quantidade)
+    return redirect(url_for('index'))
+
+
+def resposta_movimento(erro=None, status=204):
+    """Como app.resposta_movimento: redirect no envio normal, 204 / {"erro": ...} no envio por fetch."""
+    if not quer_json(request.accept_mimetypes):
+        if status == 404:
+            abort(404)
+        return redirect(url_for('index'))
+    if erro:
+        return _erro_json(erro, status)
+    return '', 204
+
+
+@app.route('/movimento/<int:ferramenta_id>/<string:tipo>', methods=['POST'])
+async def registrar_movimento(ferramenta_id, tipo):
+    formulario = await request.form
+    usuario = (formulario.get('usuario') or '').strip()
+    try:
+        quantidade_movimento = int(formulario.get('quantidade_movimento'))
+    except (TypeError, ValueError):
+        return resposta_movimento('quantidade deve ser um inteiro', 400)
+
+    if not usuario or quantidade_movimento <= 0 or tipo not in TIPOS_MOVIMENTO:
+        return resposta_movimento('informe o usuário e uma quantidade maior que zero', 400)
+
+    # Group commit (MOVIMENTOS_GRUPO=1): a mesma fila do modo WSGI, gravada pela thread escritora dela
+    if app_wsgi.fila_movimentos is not None:
+        dados = {'ferramenta_id': ferramenta_id, 'tipo': tipo, 'usuario': usuario, 'quantidade': quantidade_movimento}
+        try:
+            # enviar pode reler o saldo no banco (síncrono), então roda numa thread; o shield impede
+            # que o timeout cancele o futuro, que a thread escritora ainda vai resolver
+            futuro = await asyncio.to_thread(app_wsgi.fila_movimentos.enviar, dados)
+            resultado = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(futuro)), GRUPO_ESPERA_MAXIMA)
+        except Exception:
+            app.logger.exception('movimento da fila não confirmado')
+            return _erro_json('movimento não confirmado, tente de novo', 503)
+        if resultado.get('erro') == 'ferramenta não encontrada':
+            return resposta_movimento(resultado['erro'], 404)
+        if resultado['status'] != 'ok':
+            return resposta_movimento(resultado['erro'], 409)
+        return resposta_movimento()
+
+    movimento = await aplicar_movimento(ferramenta_id, tipo, usuario, quantidade_movimento)
+    if movimento is None:
+        if not await ferramenta_existe(ferramenta_id):
+            return resposta_movimento('ferramenta não encontrada', 404)
+        return resposta_movimento('saldo insuficiente', 409)
+    return resposta_movimento()
+
+
+@app.route('/editar/<int:ferramenta_id>', methods=['GET', 'POST'])
+async def editar_ferramenta(ferramenta_id):
+    async with Sessao() as sessao:
+        ferramenta = await sessao.get(Ferramenta, ferramenta_id)
+        if ferramenta is None:
+            abort(404)
+        if request.method == 'GET':
+            return await render_template('editar.html', ferramenta=ferramenta)
+
+        formulario = await request.form
+        novo_nome = (formulario.get('nome') or '').strip()
+        try:
+            nova_quantidade = int(formulario.get('quantidade'))
+        except (TypeError, ValueError):
+            return redirect(url_for('index'))
+        if nova_quantidade < 0:
+            abort(400, description='A quantidade não pode ser negativa.')
+
+        if novo_nome:
+            # Lê o saldo de novo já com o lock de escrita (no PostgreSQL, com a linha travada),
+            # para o AJUSTE registrar a diferença real
+            await _iniciar_transacao_de_escrita(sessao)
+            # populate_existing: como em app.editar_ferramenta, o objeto foi lido antes do lock
+            ferramenta = (await sessao.execute(
+                db.select(Ferramenta).where(Ferramenta.id == ferramenta_id).with_for_update()
+                .execution_options(populate_existing=True))).scalar_one()
+            saldo_atual = ferramenta.quantidade or 0
+            if novo_nome != ferramenta.nome:
+                marcar_reescrita(sessao)
+            ferramenta.nome = novo_nome
+            ferramenta.quantidade = nova_quantidade
+            if nova_quantidade != saldo_atual:
+                sessao.add(Movimento(**linha_ajuste(ferramenta_id, nova_quantidade - saldo_atual, MOTIVO_EDICAO)))
+            await sessao.commit()
+            invalidar_inventario()
+            publicar_estoque(ferramenta_id, nova_quantidade, nome=novo_nome)
+    return redirect(url_for('index'))
+
+
+@app.route('/deletar/<int:ferramenta_id>', methods=['POST'])
+async def deletar_ferramenta(ferramenta_id):
+    # Como app.excluir_ferramenta: movimentos em lotes, cada um numa transação curta; fotos, arquivo
+    # e o que entrar no meio saem com a ferramenta (ON DELETE CASCADE)
+    tabela = Movimento.__table__
+    lote = db.select(tabela.c.id).where(tabela.c.ferramenta_id == ferramenta_id).limit(EXCLUSAO_LOTE)
+    async with Sessao() as sessao:
+        if await sessao.get(Ferramenta, ferramenta_id) is None:
+            abort(404)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                await _iniciar_transacao_de_escrita(sessao)
+                resultado = await sessao.execute(db.delete(tabela).where(tabela.c.id.in_(lote.scalar_subquery())))
+                marcar_reescrita(sessao)
+                await sessao.commit()
+                if resultado.rowcount < EXCLUSAO_LOTE:
+                    break
+                # Mesma pausa de app._pausa_entre_lotes, sem prender o event loop
+                await asyncio.sleep(time.perf_counter() - inicio)
+            await _iniciar_transacao_de_escrita(sessao)
+            await sessao.execute(db.delete(Ferramenta).where(Ferramenta.id == ferramenta_id))
+            marcar_reescrita(sessao)
+            await sessao.commit()
+            eventos.publicar('removida', {'id': ferramenta_id})
+        finally:
+            invalidar_inventario()
+            invalidar_relatorios()
+    return redirect(url_for('index'))
+
+
+# --- Eventos ao vivo (/eventos) ---
+
+class AssinaturaAssincrona:
+    """Como app.AssinaturaEventos, mas entrega no event loop do stream (a publicação vem de qualquer thread)."""
+
+    def __init__(self, tamanho=EVENTOS_FILA_MAXIMA):
+        self.loop = asyncio.get_running_loop()
+        self.fila = asyncio.Queue(tamanho)
+        self.atrasada = False
+
+    def __call__(self, evento):
+        self.loop.call_soon_threadsafe(self._entregar, evento)
+
+    def _entregar(self, evento):
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.atrasada = True
+
+
+async def stream_eventos(ultimo_id):
+    """Mesmo protocolo de app.stream_eventos; cada stream aberto é só uma corrotina."""
+    assinatura = AssinaturaAssincrona()
+    eventos.assinar(assinatura)
+    try:
+        yield f'retry: {EVENTOS_RETRY_MS}\n\n'.encode()
+        perdidos = eventos.retomar(ultimo_id)
+        if perdidos is None:
+            yield MENSAGEM_RECARREGAR.encode()
+            return
+        enviado = 0
+        for evento in perdidos:
+            yield evento.mensagem.encode()
+            enviado = evento.numero
+        while not assinatura.atrasada:
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), EVENTOS_PING_S)
+            except asyncio.TimeoutError:
+                yield b': ping\n\n'
+                continue
+            if evento.numero > enviado:
+                yield evento.mensagem.encode()
+                enviado = evento.numero
+        yield MENSAGEM_RECARREGAR.encode()
+    finally:
+        eventos.cancelar(assinatura)
+
+
+@app.route('/eventos')
+async def eventos_estoque():
+    if not EVENTOS_ATIVOS:
+        abort(404)
+    resposta = Response(stream_eventos(request.headers.get('Last-Event-ID') or request.args.get('desde')),
+                        mimetype='text/event-stream')
+    resposta.headers['Cache-Control'] = 'no-cache'
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    # Sem o limite de tempo de resposta do Quart: o stream fica aberto enquanto o dashboard estiver
+    resposta.timeout = None
+    return resposta
+
+
+# --- Histórico ---
+
+class PaginaHistorico:
+    """Como app.PaginaHistorico, mas iterada com `async for` (o Jinja do Quart roda em modo assíncrono)."""
+
+    def __init__(self, consulta, limite):
+        self.consulta = consulta
+        self.limite = limite
+        self.proximo_cursor = None
+
+    async def __aiter__(self):
+        ultimo = None
+        async with Sessao() as sessao:
+            resultado = await sessao.stream_scalars(self.consulta.limit(self.limite + 1))
+            posicao = 0
+            async for movimento in resultado:
+                if posicao == self.limite:
+                    self.proximo_cursor = _formatar_cursor(ultimo)
+                    break
+                ultimo = movimento
+                posicao += 1
+                yield movimento
+
+
+def _consulta_historico_da_requisicao(ferramenta_id):
+    fim = _ler_data(request.args.get('data_fim'))
+    return consulta_historico(ferramenta_id,
+                              data_inicio=_ler_data(request.args.get('data_inicio')),
+                              data_fim=fim + datetime.timedelta(days=1) if fim else None,
+                              usuario=request.args.get('usuario', '').strip(),
+                              antes=_ler_cursor(request.args.get('antes')))
+
+
+def _limite_historico():
+    return _int_argumento('limite', HISTORICO_POR_PAGINA_PADRAO, minimo=1, maximo=HISTORICO_POR_PAGINA_MAXIMO,
+                          argumentos=request.args)
+
+
+@app.route('/historico/<int:ferramenta_id>')
+async def historico(ferramenta_id):
+    async with Sessao() as sessao:
+        ferramenta = await sessao.get(Ferramenta, ferramenta_id)
+    if ferramenta is None:
+        abort(404)
+
+    limite = _limite_historico()
+    pagina = PaginaHistorico(_consulta_historico_da_requisicao(ferramenta_id), limite)
+    return await stream_template('historico.html', ferramenta=ferramenta, movimentos=pagina, pagina=pagina,
+                                 data_inicio=request.args.get('data_inicio', ''),
+                                 data_fim=request.args.get('data_fim', ''),
+                                 usuario=request.args.get('usuario', '').strip(),
+                                 antes=_ler_cursor(request.args.get('antes')), limite=limite)
+
+
+# --- API JSON ---
+
+def _erro_json(mensagem, status):
+    return {'erro': mensagem}, status
+
+
+@app.route('/api/ferramentas', methods=['GET'])
+async def api_listar_ferramentas():
+    filtros = filtros_dashboard(request.args)
+    ferramentas, proximo_cursor = await consultar_ferramentas_cache(await versao_inventario(), **filtros)
+    return {'ferramentas': [f._asdict() for f in ferramentas], 'proximo_cursor': proximo_cursor}
+
+
+@app.route('/api/ferramentas', methods=['POST'])
+async def api_cadastrar_ferramenta():
+    dados = await request.get_json(silent=True) or {}
+    nome = str(dados.get('nome') or '').strip()
+    try:
+        quantidade = int(dados.get('quantidade', 0))
+    except (TypeError, ValueError):
+        return _erro_json('quantidade deve ser um inteiro', 400)
+    if not nome or quantidade < 0:
+        return _erro_json('nome é obrigatório e quantidade não pode ser negativa', 400)
+    return _ferramenta_json(await cadastrar(nome, quantidade)), 201
+
+
+@app.route('/api/ferramentas/<int:ferramenta_id>', methods=['GET'])
+async def api_obter_ferramenta(ferramenta_id):
+    async with Sessao() as sessao:
+        ferramenta = await sessao.get(Ferramenta, ferramenta_id)
+    if ferramenta is None:
+        return _erro_json('ferramenta não encontrada', 404)
+    return _ferramenta_json(ferramenta)
+
+
+@app.route('/api/movimentos', methods=['GET'])
+async def api_listar_movimentos():
+    ferramenta_id = _int_argumento('ferramenta_id', None, argumentos=request.args)
+    if ferramenta_id is None:
+        return _erro_json('ferramenta_id é obrigatório', 400)
+    limite = _limite_historico()
+    async with Sessao() as sessao:
+        consulta = _consulta_historico_da_requisicao(ferramenta_id).limit(limite + 1)
+        movimentos = (await sessao.scalars(consulta)).all()
+    proximo_cursor = _formatar_cursor(movimentos[limite - 1]) if len(movimentos) > limite else None
+    return {'movimentos': [_movimento_json(m) for m in movimentos[:limite]], 'proximo_cursor': proximo_cursor}
+
+
+@app.route('/api/movimentos', methods=['POST'])
+async def api_registrar_movimento():
+    dados, erro = _validar_movimento(await request.get_json(silent=True))
+    if erro:
+        return _erro_json(erro, 400)
+    movimento = await aplicar_movimento(dados['ferramenta_id'], dados['tipo'], dados['usuario'], dados['quantidade'])
+    if movimento is None:
+        if not await ferramenta_existe(dados['ferramenta_id']):
+            return _erro_json('ferramenta não encontrada', 404)
+        return _erro_json('saldo insuficiente', 409)
+    return _movimento_json(movimento), 201
+
+
+# --- Rotas atendidas pelo app WSGI ---
+# As regras que não têm versão assíncrona são registradas aqui só para o url_for dos templates
+# funcionar; os requests para elas são despachados ao app.py antes de chegar ao Quart.
+ROTAS_ASSINCRONAS = frozenset(app.view_functions) - {'static'}
+for regra in app_wsgi.app.url_map.iter_rules():
+    if regra.endpoint not in app.view_functions:
+        app.url_map.add(app.url_rule_class(regra.rule, endpoint=regra.endpoint, methods=regra.methods))
+
+app_sincrono = AsyncioWSGIMiddleware(app_wsgi.app, max_body_size=TAMANHO_MAXIMO_WSGI)
+
+
+def _rota_assincrona(escopo):
+    adaptador = app.url_map.bind('localhost', script_name=escopo.get('root_path') or None)
+    try:
+        endpoint, _ = adaptador.match(escopo['path'], method=escopo['method'])
+    except HTTPException:
+        # 404, 405 e redirecionamentos de barra final ficam com o app WSGI, como antes
+        return False
+    return endpoint in ROTAS_ASSINCRONAS
+
+
+async def aplicacao(escopo, receber, enviar):
+    """Ponto de entrada ASGI: rotas assíncronas no Quart, o resto no app WSGI (em thread)."""
+    if escopo['type'] == 'http' and not _rota_assincrona(escopo):
+        await app_sincrono(escopo, receber, enviar)
+    else:
+        await app(escopo, receber, enviar)
@@ -0,0 +1,15 @@
+"""Funções pequenas usadas por vários benchmarks (porta do servidor de teste e percentis)."""
+import socket
+
+
+def porta_livre():
+    """Uma porta TCP livre em 127.0.0.1, para subir o servidor medido."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentil(valores, p):
+    """Percentil `p` (0 a 1) pelo valor mais próximo na lista ordenada; 0.0 sem valores."""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))] if ordenados else 0.0
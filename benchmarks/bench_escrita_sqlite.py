@@ -0,0 +1,142 @@
+"""
+Vazão de escrita do SQLite com o perfil padrão x otimizado (SQLITE_PERFIL).
+
+Para cada perfil, cria um banco novo, sobe vários processos escritores gravando
+ENTRADAs com aplicar_movimento e, opcionalmente, processos leitores consultando o
+dashboard ao mesmo tempo. Informa movimentos/s, latência p50/p99 dos commits e
+quantos 'database is locked' escaparam.
+
+Uso:
+    python benchmarks/bench_escrita_sqlite.py --escritores 4 --leitores 2 --operacoes 300
+    python benchmarks/bench_escrita_sqlite.py --perfis otimizado
+
+Só SQLite: os perfis são PRAGMAs dele. A vazão de escrita no PostgreSQL sai de
+bench_movimentos_concorrentes.py e bench_group_commit.py com --database-url.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from _comum import percentil
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def _importar_app():
+    sys.path.insert(0, str(RAIZ))
+    import app as modulo_app
+    return modulo_app
+
+
+def _preparar(ferramentas):
+    modulo_app = _importar_app()
+    with modulo_app.app.app_context():
+        modulo_app.db.session.add_all([modulo_app.Ferramenta(nome=f'Ferramenta {i}', quantidade=0)
+                                       for i in range(ferramentas)])
+        modulo_app.db.session.commit()
+
+
+def _escritor(indice, operacoes, ferramentas, inicio, resultados):
+    from sqlalchemy.exc import OperationalError
+    modulo_app = _importar_app()
+    latencias, bloqueios = [], 0
+    inicio.wait()
+    with modulo_app.app.app_context():
+        for i in range(operacoes):
+            t0 = time.perf_counter()
+            try:
+                modulo_app.aplicar_movimento(1 + (indice + i) % ferramentas, 'ENTRADA', f'escritor-{indice}', 1)
+            except OperationalError:
+                bloqueios += 1
+                continue
+            latencias.append(time.perf_counter() - t0)
+    resultados.put(('escritor', latencias, bloqueios))
+
+
+def _leitor(indice, inicio, parar, resultados):
+    from sqlalchemy.exc import OperationalError
+    modulo_app = _importar_app()
+    leituras, bloqueios = 0, 0
+    inicio.wait()
+    with modulo_app.app.app_context():
+        while not parar.is_set():
+            try:
+                modulo_app.consultar_ferramentas(limite=50)
+                modulo_app.db.session.rollback()
+                leituras += 1
+            except OperationalError:
+                bloqueios += 1
+    resultados.put(('leitor', leituras, bloqueios))
+
+
+def executar_perfil(perfil, args):
+    pasta = tempfile.mkdtemp(prefix=f'bench_escrita_{perfil}_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'bench.db')
+    os.environ['SQLITE_PERFIL'] = perfil
+
+    contexto = multiprocessing.get_context('spawn')
+    preparo = contexto.Process(target=_preparar, args=(args.ferramentas,))
+    preparo.start()
+    preparo.join()
+
+    inicio, parar, resultados = contexto.Event(), contexto.Event(), contexto.Queue()
+    escritores = [contexto.Process(target=_escritor, args=(i, args.operacoes, args.ferramentas, inicio, resultados))
+                  for i in range(args.escritores)]
+    leitores = [contexto.Process(target=_leitor, args=(i, inicio, parar, resultados))
+                for i in range(args.leitores)]
+    for processo in escritores + leitores:
+        processo.start()
+    time.sleep(2)
+
+    t0 = time.perf_counter()
+    inicio.set()
+    latencias, bloqueios_escrita, leituras, bloqueios_leitura = [], 0, 0, 0
+    for _ in escritores:
+        _, lat, bloq = resultados.get()
+        latencias.extend(lat)
+        bloqueios_escrita += bloq
+    duracao = time.perf_counter() - t0
+    parar.set()
+    for _ in leitores:
+        _, lidas, bloq = resultados.get()
+        leituras += lidas
+        bloqueios_leitura += bloq
+    for processo in escritores + leitores:
+        processo.join()
+
+    return {
+        'perfil': perfil,
+        'movimentos_por_s': len(latencias) / duracao,
+        'p50_ms': percentil(latencias, 0.50) * 1000,
+        'p99_ms': percentil(latencias, 0.99) * 1000,
+        'media_ms': statistics.fmean(latencias) * 1000 if latencias else 0.0,
+        'bloqueios_escrita': bloqueios_escrita,
+        'leituras_por_s': leituras / duracao,
+        'bloqueios_leitura': bloqueios_leitura,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--perfis', nargs='+', default=['padrao', 'otimizado'])
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--leitores', type=int, default=2)
+    parser.add_argument('--operacoes', type=int, default=300, help='movimentos por escritor')
+    parser.add_argument('--ferramentas', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{"perfil":<10} {"mov/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"locks":>6} {"leituras/s":>11} {"locks leit.":>11}')
+    for perfil in args.perfis:
+        r = executar_perfil(perfil, args)
+        print(f'{r["perfil"]:<10} {r["movimentos_por_s"]:>9.1f} {r["p50_ms"]:>8.2f} {r["p99_ms"]:>8.2f} '
+              f'{r["bloqueios_escrita"]:>6} {r["leituras_por_s"]:>11.1f} {r["bloqueios_leitura"]:>11}')
+
+
+if __name__ == '__main__':
+    main()
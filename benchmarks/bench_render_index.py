@@ -0,0 +1,68 @@
+"""
+Micro-benchmark da renderização do dashboard (template index.html) com 10, 1.000 e 10.000 ferramentas.
+
+Compara dois modos:
+    string  compila o template a partir do texto em todo request (como o antigo render_template_string)
+    cache   usa o template nomeado, compilado uma vez e reaproveitado pelo Jinja
+
+Só mede a renderização: as ferramentas são objetos em memória, sem banco.
+
+Uso:
+    python benchmarks/bench_render_index.py
+    python benchmarks/bench_render_index.py --tamanhos 10 1000 --repeticoes 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def _contexto(ferramentas):
+    return dict(ferramentas=ferramentas, reset_success=None, busca='', modo='prefixo', filtro='',
+                abaixo_de=5, limite=len(ferramentas), apos=None, proximo_cursor=None)
+
+
+def medir(modo_app, modo, ferramentas, repeticoes):
+    from flask import render_template, render_template_string
+    app = modo_app.app
+    fonte = modo_app.TEMPLATES['index.html']
+    contexto = _contexto(ferramentas)
+    with app.test_request_context('/'):
+        tempos = []
+        for _ in range(repeticoes):
+            t0 = time.perf_counter()
+            if modo == 'string':
+                html = render_template_string(fonte, **contexto)
+            else:
+                html = render_template('index.html', **contexto)
+            tempos.append(time.perf_counter() - t0)
+    return min(tempos), sum(tempos) / len(tempos), len(html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--repeticoes', type=int, default=None,
+                        help='padrão: ~2000 cartões renderizados por tamanho (mínimo 3 repetições)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    sys.path.insert(0, str(RAIZ))
+    import app as modulo_app
+
+    print(f'{"ferramentas":>11} {"modo":>7} {"mín ms":>9} {"média ms":>9} {"KB":>9}')
+    for tamanho in args.tamanhos:
+        ferramentas = [SimpleNamespace(id=i, nome=f'Ferramenta {i}', quantidade=i % 8) for i in range(1, tamanho + 1)]
+        repeticoes = args.repeticoes or max(3, 2000 // tamanho)
+        for modo in ('string', 'cache'):
+            minimo, media, tamanho_html = medir(modulo_app, modo, ferramentas, repeticoes)
+            print(f'{tamanho:>11} {modo:>7} {minimo * 1000:>9.2f} {media * 1000:>9.2f} {tamanho_html / 1024:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
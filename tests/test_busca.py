@@ -0,0 +1,38 @@
+"""Busca por nome do dashboard / GET /api/ferramentas: sem diferenciar maiúsculas, acentuadas inclusive."""
+import io
+
+import pytest
+
+
+def _nomes(cliente, busca, modo):
+    resposta = cliente.get('/api/ferramentas', query_string={'busca': busca, 'modo': modo})
+    assert resposta.status_code == 200
+    return [ferramenta['nome'] for ferramenta in resposta.get_json()['ferramentas']]
+
+
+@pytest.mark.parametrize('busca, modo, esperado', [
+    ('Ângulo', 'prefixo', ['Ângulo reto']),
+    ('ângulo', 'prefixo', ['Ângulo reto']),
+    ('ÂNG', 'prefixo', ['Ângulo reto']),
+    ('ótica', 'contem', ['Lupa Ótica']),
+    ('ÓTICA', 'contem', ['Lupa Ótica']),
+    ('lupa', 'prefixo', ['Lupa Ótica']),
+    ('an', 'prefixo', []),
+])
+def test_busca_com_acentos(cliente, nova_ferramenta, busca, modo, esperado):
+    nova_ferramenta('Ângulo reto')
+    nova_ferramenta('Lupa Ótica')
+    nova_ferramenta('Alicate')
+    assert _nomes(cliente, busca, modo) == esperado
+
+
+def test_nome_editado_e_importado_entram_na_busca(cliente, nova_ferramenta):
+    ferramenta_id = nova_ferramenta('Chave')
+    cliente.post(f'/editar/{ferramenta_id}', data={'nome': 'Égua de bancada', 'quantidade': 10})
+    arquivo = io.BytesIO('nome,quantidade\nÍmã industrial,2\n'.encode())
+    resposta = cliente.post('/importar/ferramentas', data={'arquivo': (arquivo, 'ferramentas.csv')})
+    assert resposta.status_code == 200, resposta.get_json()
+
+    assert _nomes(cliente, 'égua', 'prefixo') == ['Égua de bancada']
+    assert _nomes(cliente, 'chave', 'prefixo') == []
+    assert _nomes(cliente, 'ÍMÃ', 'contem') == ['Ímã industrial']
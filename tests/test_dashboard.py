@@ -0,0 +1,56 @@
+"""ETag do dashboard: o mesmo em qualquer worker enquanto os dados não mudam, novo depois de uma escrita."""
+import app as modulo_app
+
+
+def test_304_em_outro_worker(app_teste, cliente, nova_ferramenta, monkeypatch):
+    nova_ferramenta()
+    etag = cliente.get('/').headers['ETag']
+    assert cliente.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    # Outro worker (token de processo e cache próprios), sem escrita no meio: o ETag sai igual
+    monkeypatch.setattr(modulo_app, '_TOKEN_PROCESSO', 'outro')
+    modulo_app.cache_paginas.limpar()
+    resposta = cliente.get('/', headers={'If-None-Match': etag})
+    assert resposta.status_code == 304
+    assert resposta.headers['ETag'] == etag
+    assert resposta.get_data() == b''
+
+
+def test_200_depois_de_uma_escrita(app_teste, cliente, nova_ferramenta):
+    ferramenta_id = nova_ferramenta()
+    etag = cliente.get('/').headers['ETag']
+    cliente.post(f'/movimento/{ferramenta_id}/SAIDA', data={'usuario': 'teste', 'quantidade_movimento': 1})
+    resposta = cliente.get('/', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+
+
+def test_200_depois_de_uma_escrita_em_outro_worker(app_teste, cliente, nova_ferramenta, monkeypatch):
+    ferramenta_id = nova_ferramenta()
+    primeira = cliente.get('/')
+    etag = primeira.headers['ETag']
+    # A escrita não limpa o cache deste processo, como se tivesse sido feita por outro worker
+    monkeypatch.setattr(modulo_app, 'invalidar_inventario', lambda: None)
+    cliente.post(f'/movimento/{ferramenta_id}/SAIDA', data={'usuario': 'teste', 'quantidade_movimento': 1})
+    resposta = cliente.get('/', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert resposta.get_data() != primeira.get_data()
+
+
+def test_sem_stream_o_dashboard_faz_polling_do_etag(app_teste, cliente, nova_ferramenta):
+    nova_ferramenta()
+    resposta = cliente.get('/')
+    html = resposta.get_data(as_text=True)
+    assert 'EventSource' not in html
+    # O script de polling compara o ETag atual com o que a página recebeu
+    assert resposta.headers['ETag'] == 'W/"%s"' % resposta.get_etag()[0]
+    assert resposta.get_etag()[0] in html
+    assert cliente.get('/eventos').status_code == 404
+
+
+def test_com_stream_ligado_o_dashboard_assina_eventos(app_teste, cliente, nova_ferramenta, monkeypatch):
+    monkeypatch.setattr(modulo_app, 'EVENTOS_ATIVOS', True)
+    nova_ferramenta()
+    html = cliente.get('/').get_data(as_text=True)
+    assert 'EventSource' in html and 'If-None-Match' not in html
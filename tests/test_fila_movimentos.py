@@ -0,0 +1,94 @@
+"""Group commit (FilaMovimentos): a thread escritora sobrevive a qualquer lote e a rota nunca fica pendurada."""
+import pytest
+
+import app as modulo_app
+
+
+def _movimento(ferramenta_id, tipo, quantidade):
+    return {'ferramenta_id': ferramenta_id, 'tipo': tipo, 'usuario': 'teste', 'quantidade': quantidade}
+
+
+def _saldo(ferramenta_id):
+    with modulo_app.app.app_context():
+        return modulo_app.db.session.get(modulo_app.Ferramenta, ferramenta_id).quantidade
+
+
+def test_lote_com_deltas_mistos_da_mesma_ferramenta(nova_ferramenta):
+    ferramenta_id = nova_ferramenta(quantidade=0)
+    fila = modulo_app.FilaMovimentos(intervalo=0.5, tamanho=10)
+    # Pendente ao final: +2; descontando item a item ele passaria por 0 já no primeiro
+    futuros = [fila.enviar(_movimento(ferramenta_id, tipo, quantidade))
+               for tipo, quantidade in (('ENTRADA', 2), ('ENTRADA', 1), ('SAIDA', 1))]
+
+    assert [futuro.result(10)['status'] for futuro in futuros] == ['ok'] * 3
+    assert fila.estatisticas()['lotes'] == 1
+    assert fila._pendentes == {}
+    assert fila._thread.is_alive()
+    assert fila.enviar(_movimento(ferramenta_id, 'SAIDA', 2)).result(10)['status'] == 'ok'
+    assert _saldo(ferramenta_id) == 0
+
+
+def test_rota_responde_503_quando_o_lote_falha(cliente, nova_ferramenta, monkeypatch):
+    ferramenta_id = nova_ferramenta(quantidade=5)
+    fila = modulo_app.FilaMovimentos(intervalo=0.01)
+    monkeypatch.setattr(modulo_app, 'fila_movimentos', fila)
+
+    def falhar(itens, tudo_ou_nada=False):
+        raise RuntimeError('banco fora do ar')
+
+    with monkeypatch.context() as contexto:
+        contexto.setattr(modulo_app, 'aplicar_lote_movimentos', falhar)
+        resposta = cliente.post(f'/movimento/{ferramenta_id}/SAIDA', data={'usuario': 'ana', 'quantidade_movimento': 1},
+                                headers={'Accept': 'application/json'})
+    assert resposta.status_code == 503
+    assert 'erro' in resposta.get_json()
+
+    # A thread continua viva e atende o próximo movimento
+    resposta = cliente.post(f'/movimento/{ferramenta_id}/SAIDA', data={'usuario': 'ana', 'quantidade_movimento': 1},
+                            headers={'Accept': 'application/json'})
+    assert resposta.status_code == 204
+    assert _saldo(ferramenta_id) == 4
+
+
+def test_falha_ao_concluir_nao_mata_a_thread(nova_ferramenta, monkeypatch):
+    ferramenta_id = nova_ferramenta(quantidade=5)
+    fila = modulo_app.FilaMovimentos(intervalo=0.01)
+    concluir = fila._concluir
+    falhas = []
+
+    def concluir_com_falha(lote, resultados):
+        if not falhas:
+            falhas.append(1)
+            raise RuntimeError('erro inesperado')
+        concluir(lote, resultados)
+
+    monkeypatch.setattr(fila, '_concluir', concluir_com_falha)
+    futuro = fila.enviar(_movimento(ferramenta_id, 'SAIDA', 1))
+    with pytest.raises(RuntimeError):
+        futuro.result(10)
+    assert fila.enviar(_movimento(ferramenta_id, 'SAIDA', 1)).result(10)['status'] == 'ok'
+    assert fila._thread.is_alive()
+
+
+def test_saldo_relido_sem_a_trava(nova_ferramenta, monkeypatch):
+    ferramenta_id = nova_ferramenta(quantidade=1)
+    fila = modulo_app.FilaMovimentos(intervalo=0.01)
+    assert fila.enviar(_movimento(ferramenta_id, 'SAIDA', 1)).result(10)['status'] == 'ok'
+
+    # Outro worker devolve 3: a visão em memória (saldo 0) recusaria, e o saldo é relido do banco
+    with modulo_app.app.app_context():
+        modulo_app.db.session.execute(modulo_app.atualizacao_movimento(ferramenta_id, 'ENTRADA', 3))
+        modulo_app.db.session.commit()
+    ler_saldo = fila._saldo_do_banco
+    travada = []
+
+    def ler_saldo_observando(fid):
+        travada.append(fila._trava.locked())
+        return ler_saldo(fid)
+
+    monkeypatch.setattr(fila, '_saldo_do_banco', ler_saldo_observando)
+    assert fila.enviar(_movimento(ferramenta_id, 'SAIDA', 2)).result(10)['status'] == 'ok'
+    assert travada == [False]
+    resultado = fila.enviar(_movimento(ferramenta_id, 'SAIDA', 2)).result(10)
+    assert resultado == {'status': 'erro', 'erro': 'saldo insuficiente', 'saldo': 1}
+    assert _saldo(ferramenta_id) == 1
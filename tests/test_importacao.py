@@ -0,0 +1,60 @@
+"""Importação de CSV e JSON Lines: codificação do Excel (cp1252), separador ';', cabeçalho obrigatório e linhas dos erros."""
+import io
+
+
+def _importar(cliente, tipo, conteudo, nome='dados.csv'):
+    return cliente.post(f'/importar/{tipo}', data={'arquivo': (io.BytesIO(conteudo), nome)})
+
+
+def _nomes(cliente):
+    return [ferramenta['nome'] for ferramenta in cliente.get('/api/ferramentas').get_json()['ferramentas']]
+
+
+def test_csv_latin1_do_excel(cliente):
+    resposta = _importar(cliente, 'ferramentas', 'nome;quantidade\r\nEsquadro 90º;2\r\nTrena métrica;1\r\n'.encode('cp1252'))
+    assert resposta.status_code == 200
+    assert resposta.get_json() == {'importados': 2, 'rejeitados': 0, 'erros': []}
+    assert _nomes(cliente) == ['Esquadro 90º', 'Trena métrica']
+
+
+def test_csv_utf8_com_bom(cliente):
+    resposta = _importar(cliente, 'ferramentas', '\ufeffnome,quantidade\nAçoite,1\n'.encode())
+    assert resposta.get_json()['importados'] == 1
+    assert _nomes(cliente) == ['Açoite']
+
+
+def test_byte_ilegivel_aponta_a_linha(cliente):
+    # 0x81 não existe nem em UTF-8 (sozinho) nem em cp1252
+    resposta = _importar(cliente, 'ferramentas', b'nome,quantidade\nMartelo,1\nSerra\x81,2\n')
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'].startswith('linha 3:')
+    assert _nomes(cliente) == []
+
+
+def test_arquivo_sem_cabecalho(cliente):
+    resposta = _importar(cliente, 'ferramentas', b'Martelo,1\nSerra,2\n')
+    assert resposta.status_code == 400
+    assert 'cabeçalho' in resposta.get_json()['erro']
+    assert _nomes(cliente) == []
+
+
+def test_movimentos_sem_cabecalho(cliente, nova_ferramenta):
+    ferramenta_id = nova_ferramenta()
+    resposta = _importar(cliente, 'movimentos', f'{ferramenta_id},SAIDA,1,ana\n'.encode())
+    assert resposta.status_code == 400
+    assert 'ferramenta_id' in resposta.get_json()['erro']
+
+
+def test_jsonl_aponta_a_linha_com_linhas_em_branco(cliente):
+    conteudo = b'{"nome": "Martelo", "quantidade": 1}\n\n{"nome": ""}\n\n\n{"nome": "Serra", "quantidade": -1}\n'
+    resposta = _importar(cliente, 'ferramentas', conteudo, nome='dados.jsonl')
+    assert resposta.get_json() == {'importados': 1, 'rejeitados': 2, 'erros': [
+        {'linha': 3, 'erro': 'nome é obrigatório'},
+        {'linha': 6, 'erro': 'quantidade não pode ser negativa'}]}
+
+
+def test_csv_aponta_a_linha_com_linhas_em_branco(cliente, nova_ferramenta):
+    ferramenta_id = nova_ferramenta(quantidade=1)
+    conteudo = f'ferramenta_id,tipo,quantidade,usuario\n\n{ferramenta_id},SAIDA,5,ana\n'.encode()
+    resposta = _importar(cliente, 'movimentos', conteudo)
+    assert resposta.get_json()['erros'] == [{'linha': 3, 'erro': 'saldo insuficiente'}]
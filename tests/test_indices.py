@@ -0,0 +1,26 @@
+"""O histórico de uma ferramenta (primeira página e páginas pelo cursor) tem de ser servido pelo índice."""
+import datetime
+
+import pytest
+
+import app as modulo_app
+
+# Sinais de varredura ou de ordenação fora do índice em cada banco
+PROIBIDOS = {
+    'sqlite': ('SCAN movimento', 'USE TEMP B-TREE'),
+    'postgresql': ('Seq Scan', 'Sort'),
+}
+
+
+@pytest.mark.parametrize('antes', [None, (datetime.datetime(2000, 1, 1), 1)], ids=['primeira_pagina', 'cursor'])
+def test_historico_usa_indice(app_teste, nova_ferramenta, antes):
+    ferramenta_id = nova_ferramenta()
+    for _ in range(3):
+        with app_teste.app_context():
+            modulo_app.aplicar_movimento(ferramenta_id, 'SAIDA', 'teste', 1)
+
+    with app_teste.app_context():
+        plano = modulo_app.plano_consulta_historico(antes=antes)
+        proibidos = PROIBIDOS[modulo_app.db.engine.dialect.name]
+    assert plano
+    assert not [linha for linha in plano if any(sinal in linha for sinal in proibidos)], '\n'.join(plano)
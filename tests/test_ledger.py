@@ -0,0 +1,120 @@
+"""Fotos de saldo, saldo_em e arquivo com ids fora da ordem das datas (como acontece no PostgreSQL)."""
+import datetime
+
+import pytest
+
+import app as modulo_app
+
+T0 = datetime.datetime(2025, 3, 1, 12, 0)
+
+
+def _em(minutos):
+    return T0 + datetime.timedelta(minutes=minutos)
+
+
+def _inserir(ferramenta_id, tipo, quantidade, minutos):
+    """Grava um movimento com data explícita e ajusta o saldo da ferramenta junto."""
+    db = modulo_app.db
+    with modulo_app.app.app_context():
+        db.session.execute(db.insert(modulo_app.Movimento.__table__).values(
+            ferramenta_id=ferramenta_id, tipo=tipo, quantidade=quantidade, usuario='teste',
+            data_movimento=_em(minutos)))
+        delta = -quantidade if tipo == 'SAIDA' else quantidade
+        db.session.execute(db.update(modulo_app.Ferramenta.__table__)
+                           .where(modulo_app.Ferramenta.id == ferramenta_id)
+                           .values(quantidade=modulo_app.Ferramenta.quantidade + delta))
+        db.session.commit()
+    return minutos, delta
+
+
+def _saldo_esperado(movimentos, minutos):
+    return sum(delta for quando, delta in movimentos if quando <= minutos)
+
+
+def _conferir(ferramenta_id, movimentos, instantes):
+    with modulo_app.app.app_context():
+        for minutos in instantes:
+            saldo, _ = modulo_app.saldo_em(ferramenta_id, _em(minutos))
+            assert saldo == _saldo_esperado(movimentos, minutos), f'{minutos} min'
+
+
+@pytest.fixture
+def ferramenta(nova_ferramenta):
+    return nova_ferramenta(quantidade=0)
+
+
+def test_saldo_em_com_ids_fora_de_ordem(app_teste, ferramenta):
+    # O id 1 tem data posterior à do id 2
+    movimentos = [_inserir(ferramenta, 'ENTRADA', 10, 20), _inserir(ferramenta, 'ENTRADA', 5, 10)]
+    with app_teste.app_context():
+        assert modulo_app.criar_snapshot() is not None
+        # A fronteira é o último movimento na ordem (data, id), não o de maior id
+        assert modulo_app._ultima_foto() == modulo_app.Fronteira(_em(20), 1)
+
+    # Depois da foto, de novo fora de ordem entre si, mas ambos depois da fronteira
+    movimentos += [_inserir(ferramenta, 'SAIDA', 3, 40), _inserir(ferramenta, 'SAIDA', 4, 30)]
+    instantes = [5, 10, 15, 20, 25, 30, 35, 40, 45]
+    _conferir(ferramenta, movimentos, instantes)
+
+    with app_teste.app_context():
+        assert modulo_app.reconciliar_saldos()['divergencias'] == []
+        assert modulo_app.criar_snapshot() is not None
+        assert modulo_app.reconciliar_saldos()['divergencias'] == []
+        assert modulo_app.criar_snapshot() is None
+    _conferir(ferramenta, movimentos, instantes)
+
+
+def test_saldo_em_depois_de_arquivar(app_teste, ferramenta):
+    movimentos = [_inserir(ferramenta, 'ENTRADA', 10, 20), _inserir(ferramenta, 'ENTRADA', 5, 10)]
+    with app_teste.app_context():
+        modulo_app.criar_snapshot()
+    movimentos += [_inserir(ferramenta, 'SAIDA', 3, 40), _inserir(ferramenta, 'SAIDA', 4, 30)]
+
+    with app_teste.app_context():
+        resumo = modulo_app.arquivar_movimentos(_em(35))
+        assert resumo['movimentos'] == 3
+        assert modulo_app.reconciliar_saldos()['divergencias'] == []
+    _conferir(ferramenta, movimentos, [5, 10, 15, 20, 25, 30, 35, 40, 45])
+
+
+def test_relatorios_devolvem_inteiros(cliente, nova_ferramenta):
+    # O PostgreSQL devolve SUM de inteiros como numeric
+    ferramenta = nova_ferramenta(quantidade=10)
+    cliente.post(f'/movimento/{ferramenta}/SAIDA', data={'usuario': 'ana', 'quantidade_movimento': 3})
+    cliente.post(f'/movimento/{ferramenta}/ENTRADA', data={'usuario': 'ana', 'quantidade_movimento': 1})
+    usuarios = cliente.get('/api/relatorios/saldo-por-usuario').get_json()['usuarios']
+    assert usuarios[0]['total'] == 2 and isinstance(usuarios[0]['total'], int)
+    mais_usadas = cliente.get('/api/relatorios/mais-usadas').get_json()['ferramentas']
+    assert mais_usadas[0]['unidades'] == 3 and isinstance(mais_usadas[0]['unidades'], int)
+
+
+def test_editar_com_movimento_concorrente(app_teste, cliente, monkeypatch):
+    # A ferramenta foi lida com saldo 5; antes do lock, outro request registra uma ENTRADA de 3.
+    # Voltar para 5 precisa gravar o saldo e o AJUSTE de -3, não só o AJUSTE.
+    ferramenta_id = cliente.post('/api/ferramentas', json={'nome': 'Serra', 'quantidade': 5}).get_json()['id']
+    original = modulo_app._iniciar_transacao_de_escrita
+
+    def com_movimento_antes(*tabelas):
+        with modulo_app.db.engine.begin() as conexao:
+            conexao.execute(modulo_app.db.insert(modulo_app.Movimento.__table__).values(
+                ferramenta_id=ferramenta_id, tipo='ENTRADA', quantidade=3, usuario='outro'))
+            conexao.execute(modulo_app.db.update(modulo_app.Ferramenta.__table__)
+                            .where(modulo_app.Ferramenta.id == ferramenta_id)
+                            .values(quantidade=modulo_app.Ferramenta.quantidade + 3))
+        monkeypatch.setattr(modulo_app, '_iniciar_transacao_de_escrita', original)
+        original(*tabelas)
+
+    monkeypatch.setattr(modulo_app, '_iniciar_transacao_de_escrita', com_movimento_antes)
+    assert cliente.post(f'/editar/{ferramenta_id}', data={'nome': 'Serra', 'quantidade': 5}).status_code == 302
+
+    with app_teste.app_context():
+        assert modulo_app.db.session.get(modulo_app.Ferramenta, ferramenta_id).quantidade == 5
+        assert modulo_app.reconciliar_saldos()['divergencias'] == []
+
+
+def test_editar_recusa_quantidade_negativa(app_teste, cliente, nova_ferramenta):
+    ferramenta_id = nova_ferramenta(quantidade=4)
+    assert cliente.post(f'/editar/{ferramenta_id}', data={'nome': 'Martelo', 'quantidade': -1}).status_code == 400
+    with app_teste.app_context():
+        assert modulo_app.db.session.get(modulo_app.Ferramenta, ferramenta_id).quantidade == 4
+        assert modulo_app.reconciliar_saldos()['divergencias'] == []
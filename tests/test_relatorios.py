@@ -0,0 +1,45 @@
+"""Cache dos relatórios: escritas feitas em outro worker também invalidam (versão lida do banco)."""
+import datetime
+
+import pytest
+
+import app as modulo_app
+
+
+@pytest.fixture
+def outro_worker(monkeypatch):
+    """As escritas deste processo passam a não limpar os caches locais, como se viessem de outro worker."""
+    monkeypatch.setattr(modulo_app, 'invalidar_relatorios', lambda: None)
+    monkeypatch.setattr(modulo_app, 'invalidar_inventario', lambda: None)
+
+
+def _unidades(cliente, **periodo):
+    ferramentas = cliente.get('/api/relatorios/mais-usadas', query_string=periodo).get_json()['ferramentas']
+    return {ferramenta['nome']: ferramenta['unidades'] for ferramenta in ferramentas}
+
+
+def test_movimento_de_outro_worker_atualiza_relatorio(app_teste, cliente, nova_ferramenta, outro_worker):
+    ferramenta_id = nova_ferramenta(quantidade=10)
+    assert _unidades(cliente) == {}
+    assert cliente.get('/api/relatorios/saldo-por-usuario').get_json()['usuarios'] == []
+
+    cliente.post(f'/movimento/{ferramenta_id}/SAIDA', data={'usuario': 'ana', 'quantidade_movimento': 3})
+    assert _unidades(cliente) == {'Martelo': 3}
+    assert cliente.get('/api/relatorios/saldo-por-usuario').get_json()['usuarios'][0]['total'] == 3
+
+
+def test_exclusao_em_outro_worker_atualiza_periodo_encerrado(app_teste, cliente, nova_ferramenta, outro_worker):
+    ferramenta_id = nova_ferramenta(quantidade=10)
+    with app_teste.app_context():
+        modulo_app.db.session.execute(modulo_app.db.insert(modulo_app.Movimento.__table__).values(
+            ferramenta_id=ferramenta_id, tipo='SAIDA', quantidade=2, usuario='ana',
+            data_movimento=datetime.datetime(2025, 1, 10, 9, 0)))
+        modulo_app.db.session.commit()
+    janeiro = {'inicio': '2025-01-01', 'fim': '2025-01-31'}
+    assert _unidades(cliente, **janeiro) == {'Martelo': 2}
+
+    # Troca de nome e exclusão mudam o passado: o período já encerrado sai do cache também
+    cliente.post(f'/editar/{ferramenta_id}', data={'nome': 'Marreta', 'quantidade': 10})
+    assert _unidades(cliente, **janeiro) == {'Marreta': 2}
+    cliente.post(f'/deletar/{ferramenta_id}')
+    assert _unidades(cliente, **janeiro) == {}